@@ -1,4 +1,16 @@
-from .gui import main
+import sys
+
+
+def main() -> None:
+    # Any argument selects the headless CLI, which never imports tkinter.
+    if len(sys.argv) > 1:
+        from .cli import main as cli_main
+
+        cli_main()
+    else:
+        from .gui import main as gui_main
+
+        gui_main()
 
 
 if __name__ == "__main__":
@@ -4,16 +4,62 @@ import asyncio
 import contextlib
 import math
 import re
-from dataclasses import dataclass
-from typing import Iterable, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Iterable, Optional, TypeVar
+from urllib.parse import urlparse
 
 from playwright.async_api import Browser, BrowserContext, ElementHandle, Error, Page, Playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from .config import AutomationConfig
+from .control_api import ControlServer, LogBroadcast
+from .diagnostics import DiagnosticChapter, DiagnosticReport, DiagnosticRow
 from .logger import Logger
-from .state import StateManager
+from .resilience import BackoffPolicy, CircuitBreakers, CircuitOpenError, PageLostError, RecoveryMetrics
+from .row_index import RowIndex
+from .state import LessonRef, StateManager, course_id, lesson_key
+from .status import RunControl, RunStatus
+from .tracing import RollingTracer
+from .timing import CLICK, COMPLETION_LAG, NAVIGATION, RENDER_SETTLE, SHORT_COMPLETION, TimingProfile, TimingStore
+from .verification import VerificationSummary
 
 _TIME_REGEX = re.compile(r"(?:(?P<h>\d+):)?(?P<m>\d{1,2}):(?P<s>\d{2})")
+_LESSON_ROW_SELECTORS = ("div.cursor-pointer", "div:has(div.cursor-pointer)")
+_PERCENTAGE_SELECTORS = ("div.w-1/12.text-xs", "div.text-xs", "span.text-xs", "span:has-text('%')")
+_PERCENTAGE_REGEX = re.compile(r"\b(\d{1,3})%")
+# _PERCENTAGE_SELECTORS as [css, text] pairs for in-page use: ":has-text()" is Playwright-only
+# and "/" must be escaped in plain CSS class names.
+_PERCENTAGE_CHAIN = [
+    [css.replace("/", "\\/"), text or None]
+    for css, text in (
+        re.fullmatch(r"(.*?)(?::has-text\('(.*)'\))?", selector).groups() for selector in _PERCENTAGE_SELECTORS
+    )
+]
+# Same lookup as _find_text_match: the first match of the first selector with non-empty text,
+# else the whole row text for the regex fallback; null for detached rows.
+_BATCH_PERCENTAGE_SCRIPT = """([rows, chain]) => rows.map((row) => {
+    if (!row.isConnected) return null;
+    for (const [css, text] of chain) {
+        let match;
+        try {
+            match = text === null
+                ? row.querySelector(css)
+                : Array.from(row.querySelectorAll(css)).find((node) => node.textContent.includes(text));
+        } catch (error) {
+            continue;
+        }
+        const value = match ? match.innerText.trim() : "";
+        if (value) return [value, true];
+    }
+    return [row.innerText, false];
+})"""
+_RENDER_POLL = 0.25
+_LEDGER_REASON = "già nel ledger"
+_HEADER_FALLBACK_SELECTOR = "button, div[role='button']"
+_DETACHED_MARKERS = ("not attached", "detached", "execution context was destroyed", "target closed", "has been closed")
+
+T = TypeVar("T")
 
 
 @dataclass(slots=True)
@@ -26,23 +72,103 @@ class LessonRow:
     raw_percentage: str
     bbox_y: float
     index: int
+    selector: str = ""
+    field_selectors: dict[str, str] = field(default_factory=dict)
+    key: str = ""
 
 
 class AutomationRunner:
-    def __init__(self, logger: Logger, stop_event: asyncio.Event, state_manager: Optional[StateManager] = None) -> None:
+    def __init__(
+        self,
+        logger: Logger,
+        stop_event: asyncio.Event,
+        state_manager: Optional[StateManager] = None,
+        timing_store: Optional[TimingStore] = None,
+    ) -> None:
         self.logger = logger
         self.stop_event = stop_event
         self.state_manager = state_manager or StateManager()
+        self.timing_store = timing_store or TimingStore()
+        self.timing = TimingProfile()
+        self.host = ""
+        self.course = ""
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.tracer: Optional[RollingTracer] = None
+        self.row_index: Optional[RowIndex] = None
+        self.header_selector = ""
+        self.breakers = CircuitBreakers()
+        self.recovery_metrics = RecoveryMetrics()
+        self.verification = VerificationSummary()
+        self.status = RunStatus()
+        self.control = RunControl()
+        self._page_lost: Optional[str] = None
+        self._closing = False
 
     async def run(self, config: AutomationConfig) -> None:
         config.ensure_valid()
+        server = await self._start_control_api(config)
+        try:
+            await self._run_session(config)
+        finally:
+            self.status.enter_phase("finished")
+            if server:
+                await server.close()
+                self.logger.sink = server.logs.inner
+
+    async def _start_control_api(self, config: AutomationConfig) -> Optional[ControlServer]:
+        if config.control_port is None:
+            return None
+        logs = LogBroadcast(self.logger.sink, self.status)
+        server = ControlServer(
+            self.status,
+            self.control,
+            self.stop_event,
+            logs,
+            self._run_metrics,
+            host=config.control_host,
+            port=config.control_port,
+            token=config.control_token,
+        )
+        try:
+            port = await server.start()
+        except OSError as exc:
+            self.logger.log(f"API di controllo non avviata: {exc}")
+            return None
+        self.logger.sink = logs
+        self.logger.log(f"API di controllo in ascolto su http://{config.control_host}:{port}")
+        return server
+
+    def _run_metrics(self) -> dict[str, object]:
+        return {
+            "recoveries": [
+                {"reason": event.reason, "seconds": round(event.seconds, 3), "success": event.success}
+                for event in self.recovery_metrics.events
+            ],
+            "verified": len(self.verification.verified),
+            "replayed": len(self.verification.replayed),
+            "failed": len(self.verification.failed),
+        }
+
+    async def _run_session(self, config: AutomationConfig) -> None:
+        self.status.url = config.url
         self.logger.divider("CONFIG")
         self.logger.log(config.as_log_summary())
+        self.host = urlparse(config.url).hostname or config.url
+        self.course = course_id(config.url)
+        self.timing = self.timing_store.profile_for(self.host, config.timing_overrides, config.adaptive_timing)
+        self.logger.divider("TIMING")
+        self.logger.log(f"Profilo timing per {self.host}:\n{self.timing.as_log_summary()}")
 
+        self.status.enter_phase("browser")
+        try:
+            await self._drive(config)
+        finally:
+            await self._shutdown()
+
+    async def _drive(self, config: AutomationConfig) -> None:
         try:
             await self._start_browser(config)
         except Exception as exc:  # pragma: no cover - defensive
@@ -51,18 +177,21 @@ class AutomationRunner:
 
         assert self.page is not None
         self.logger.divider("NAVIGAZIONE")
-        await self._navigate(config.url)
+        self.status.enter_phase("navigation")
+        try:
+            await self._navigate(config.url)
+        except (Error, CircuitOpenError) as exc:
+            self.logger.log(f"Navigazione iniziale fallita: {exc}")
+            return
         if await self._maybe_stop():
-            await self._shutdown()
             return
 
         if config.diagnostic_mode:
+            self.status.enter_phase("diagnostic")
             await self._diagnostic_walk(config)
-            await self._shutdown()
             return
 
         await self._run_playlist(config)
-        await self._shutdown()
 
     async def _start_browser(self, config: AutomationConfig) -> None:
         from playwright.async_api import async_playwright
@@ -89,11 +218,51 @@ class AutomationRunner:
             self.context = await self.browser.new_context()
 
         assert self.context is not None
-        self.page = await self.context.new_page()
-        self.page.set_default_timeout(45_000)
+        self._attach_page(await self.context.new_page())
+        if config.rolling_trace:
+            tracer = RollingTracer(self.context, self.logger, config.trace_dir, config.trace_window)
+            try:
+                await tracer.start()
+            except Error as exc:
+                self.logger.log(f"Tracing non disponibile: {exc}")
+            else:
+                self.tracer = tracer
+
+    def _attach_page(self, page: Page) -> None:
+        self.page = page
+        self.row_index = RowIndex(page, _LESSON_ROW_SELECTORS)
+        self._page_lost = None
+        page.set_default_timeout(self.timing.default_timeout * 1000)
+        page.on("crash", lambda _: self._mark_page_lost("crash"))
+        page.on("close", lambda _: self._mark_page_lost("close"))
+
+    def _mark_page_lost(self, reason: str) -> None:
+        if self._closing or self._page_lost:
+            return
+        self._page_lost = reason
+        self.logger.log(f"Evento pagina: {reason}")
+
+    def _check_page(self) -> None:
+        if self._page_is_lost():
+            raise PageLostError(self._page_lost or "close")
+
+    def _page_is_lost(self) -> bool:
+        if not self._page_lost and self.page is not None and self.page.is_closed():
+            self._mark_page_lost("close")
+        return self._page_lost is not None
 
     async def _shutdown(self) -> None:
+        self.timing_store.save()
         self.logger.log("Chiusura browser in corso...")
+        await self._close_browser()
+        self.logger.log("Terminato.")
+
+    async def _close_browser(self) -> None:
+        self._closing = True
+        if self.tracer:
+            self.logger.log(self.tracer.as_log_summary())
+            await self.tracer.stop()
+            self.tracer = None
         if self.page:
             with contextlib.suppress(Error):
                 await self.page.close()
@@ -106,12 +275,32 @@ class AutomationRunner:
         if self.playwright:
             with contextlib.suppress(Exception):
                 await self.playwright.stop()
-        self.logger.log("Terminato.")
+        self.page = self.context = self.browser = self.playwright = None
+        self._closing = False
 
     async def _navigate(self, url: str) -> None:
         assert self.page is not None
+        breaker = self.breakers.for_host(self.host)
+        policy = self._backoff()
         self.logger.log(f"Navigazione: {url}")
-        response = await self.page.goto(url, wait_until="domcontentloaded")
+        for attempt in range(1, policy.max_attempts + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(self.host, breaker.retry_after())
+            start = time.perf_counter()
+            try:
+                response = await self.page.goto(url, wait_until="domcontentloaded")
+            except Error as exc:
+                breaker.record_failure()
+                if attempt == policy.max_attempts or self._page_lost:
+                    await self._persist_trace("timeout" if isinstance(exc, PlaywrightTimeoutError) else "navigazione")
+                    raise
+                delay = policy.delay(attempt)
+                self.logger.log(f"Navigazione fallita ({attempt}/{policy.max_attempts}): {exc} - nuovo tentativo tra {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            self.timing_store.record(self.host, NAVIGATION, time.perf_counter() - start)
+            break
         if response:
             self.logger.log(f"HTTP {response.status} {response.status_text}")
         self.logger.log(f"URL corrente: {self.page.url}")
@@ -132,66 +321,251 @@ class AutomationRunner:
             if await locator.count():
                 self.logger.log(f"Overlay rilevato ({label}), tento il click")
                 with contextlib.suppress(Error):
-                    await locator.first.click(timeout=5_000)
+                    await locator.first.click(timeout=self.timing.overlay_timeout * 1000)
 
     async def _run_playlist(self, config: AutomationConfig) -> None:
         state = self.state_manager.state
         start_chapter_index = max(config.start_chapter - 1, 0)
         if state.chapter_index > start_chapter_index:
             start_chapter_index = state.chapter_index
-        self.logger.log(f"Ripresa da stato salvato: capitolo {state.chapter_index + 1}, lezione {state.lesson_index + 1}")
+        self.logger.log(
+            f"Ripresa da stato salvato: capitolo {state.chapter_index + 1} "
+            f"({self.state_manager.completed_count(self.course)} lezioni del corso già nel ledger)"
+        )
+        pending = [
+            ref.chapter_index
+            for ref in self.state_manager.pending_shortfalls(self.course)
+            if ref.chapter_index >= config.start_chapter - 1
+        ]
+        if pending and min(pending) < start_chapter_index:
+            start_chapter_index = min(pending)
+            self.logger.log(
+                f"{len(pending)} lezioni incomplete da esecuzioni precedenti: riparto dal capitolo {start_chapter_index + 1}"
+            )
 
-        chapter_headers = await self._collect_chapter_headers()
+        chapter_headers: Optional[list[ElementHandle]] = await self._collect_chapter_headers()
         self.logger.log(f"Trovati {len(chapter_headers)} capitoli")
-        for chapter_idx in range(start_chapter_index, len(chapter_headers)):
+        self.status.chapter_count = len(chapter_headers)
+        chapter_idx = start_chapter_index
+        recoveries = 0
+        while True:
             if await self._maybe_stop():
                 break
-            await self._play_chapter(config, chapter_headers, chapter_idx)
+            try:
+                if chapter_headers is None:
+                    chapter_headers = await self._collect_chapter_headers()
+                    self.status.chapter_count = len(chapter_headers)
+                if chapter_idx >= len(chapter_headers):
+                    break
+                await self._play_chapter(config, chapter_headers, chapter_idx)
+            except (PageLostError, Error) as exc:
+                reason = self._page_lost if self._page_is_lost() else _recoverable_reason(exc)
+                if reason is None:
+                    await self._persist_trace("errore")
+                    raise
+                self.logger.log(f"Errore durante il capitolo {chapter_idx + 1}: {exc}")
+                recoveries += 1
+                if recoveries > config.max_recoveries:
+                    self.logger.log(f"Limite recovery raggiunto ({config.max_recoveries}), interrompo")
+                    break
+                if not await self._recover(config, reason):
+                    break
+                chapter_headers = None
+                chapter_idx = max(self.state_manager.state.chapter_index, start_chapter_index)
+                continue
+            chapter_idx += 1
+        self.logger.log(self.recovery_metrics.as_log_summary())
+        self.logger.divider("VERIFICA")
+        self.logger.log(self.verification.as_log_summary())
         self.logger.log("Playlist completata")
 
+    async def _recover(self, config: AutomationConfig, reason: str) -> bool:
+        """Reopen the page (or the whole browser) if it was lost, then reload the course at the saved chapter."""
+        self.logger.divider("RECOVERY")
+        self.status.enter_phase("recovery")
+        self.logger.log(f"Recovery ({reason}): ripristino su capitolo {self.state_manager.state.chapter_index + 1}")
+        start = time.perf_counter()
+        await self._persist_trace(reason)
+        try:
+            if self._page_is_lost():
+                await self._reopen_page(config)
+            for _ in range(2):
+                try:
+                    await self._navigate(config.url)
+                    break
+                except CircuitOpenError as exc:
+                    self.logger.log(f"{exc}: nuovo tentativo tra {exc.retry_after:.0f}s")
+                    if await self._sleep_or_stop(exc.retry_after):
+                        raise
+            else:
+                raise CircuitOpenError(self.host, self.breakers.for_host(self.host).retry_after())
+        except Exception as exc:  # pragma: no cover - depends on browser state
+            elapsed = time.perf_counter() - start
+            self.recovery_metrics.record(reason, elapsed, False)
+            self.logger.log(f"Recovery fallito dopo {elapsed:.2f}s: {exc!r}")
+            return False
+        elapsed = time.perf_counter() - start
+        self.recovery_metrics.record(reason, elapsed, True)
+        self.logger.log(f"Recovery completato in {elapsed:.2f}s")
+        return True
+
+    async def _reopen_page(self, config: AutomationConfig) -> None:
+        if self.context is not None:
+            self._closing = True
+            if self.page:
+                with contextlib.suppress(Error):
+                    await self.page.close()
+            self._closing = False
+            try:
+                self._attach_page(await self.context.new_page())
+                return
+            except Error as exc:
+                self.logger.log(f"Contesto non utilizzabile ({exc}), riavvio il browser")
+        await self._close_browser()
+        await self._start_browser(config)
+
+    async def _sleep_or_stop(self, seconds: float) -> bool:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.stop_event.wait(), timeout=seconds)
+        return self.stop_event.is_set()
+
+    async def _persist_trace(self, reason: str) -> None:
+        if self.tracer:
+            await self.tracer.persist(reason)
+
+    def _backoff(self) -> BackoffPolicy:
+        return BackoffPolicy(base=self.timing.backoff_step)
+
     async def _diagnostic_walk(self, config: AutomationConfig) -> None:
         self.logger.divider("DIAGNOSTICA")
-        chapter_headers = await self._collect_chapter_headers()
-        self.logger.log(f"Capitoli trovati: {len(chapter_headers)}")
-        for idx, header in enumerate(chapter_headers):
-            bbox = await header.bounding_box() or {"y": math.nan}
-            text = await self._safe_inner_text(header)
-            self.logger.log(f"Capitolo {idx + 1}: '{text.strip()}' @ y={bbox['y']:.2f}")
-
-        chapter_index = max(config.start_chapter - 1, 0)
-        if chapter_index >= len(chapter_headers):
-            self.logger.log("Indice capitolo oltre il numero di capitoli disponibili")
-            return
+        report = DiagnosticReport(url=config.url)
+        limit = config.diagnostic_concurrency
+        with report.timed("collect_headers"):
+            chapter_headers = await self._collect_chapter_headers()
+        report.header_selector = self.header_selector
+        report.header_fallback = self.header_selector == _HEADER_FALLBACK_SELECTOR
+        self.logger.log(f"Capitoli trovati: {len(chapter_headers)} (selettore '{self.header_selector}')")
+
+        rows_before = await self._count_lesson_rows()
+        expanded = 0
+        if report.header_fallback:
+            # The fallback matches every button on the page (logout, consent, player): never click them.
+            self.logger.log("Nessun selettore header riconosciuto: espansione dei capitoli saltata")
+        else:
+            with report.timed("expand_chapters"):
+                for idx in range(len(chapter_headers)):
+                    if await self._maybe_stop():
+                        return
+                    expanded += await self._ensure_expanded(chapter_headers, idx)
+            self.logger.log(f"Capitoli espansi: {expanded} (già aperti: {len(chapter_headers) - expanded})")
+        if expanded:
+            with report.timed("render_wait"):
+                await self._wait_for_render(rows_before)
+
+        assert self.row_index is not None
+        with report.timed("inspect_headers"):
+            titles = await _bounded_gather(limit, (self._safe_inner_text(header) for header in chapter_headers))
+        with report.timed("row_index"):
+            chapter_rows = await _bounded_gather(
+                limit, (self.row_index.chapter_rows(chapter_headers, idx) for idx in range(len(chapter_headers)))
+            )
+        report.chapters = [
+            DiagnosticChapter(
+                index=idx, title=title.strip(), bbox_y=math.nan if math.isinf(chapter.y_min) else chapter.y_min
+            )
+            for idx, (title, chapter) in enumerate(zip(titles, chapter_rows))
+        ]
+        row_selector = self.row_index.selector
 
-        await self._ensure_expanded(chapter_headers, chapter_index)
-        await asyncio.sleep(5.5)
-        lessons, (y_min, y_max) = await self._collect_lessons_in_chapter(chapter_headers, chapter_index)
-        self.logger.log(f"Nel capitolo {chapter_index + 1} trovate {len(lessons)} righe cliccabili")
-        valid, skipped = 0, 0
-        for idx, lesson in enumerate(lessons[:5]):
-            decision, reason = self._lesson_decision(lesson)
-            info = (
-                f"Lezione {idx + 1}: title='{lesson.title}' | durata='{lesson.duration_label}' ({lesson.duration_seconds}s) "
-                f"| percentuale='{lesson.raw_percentage}' | y={lesson.bbox_y:.2f} | decisione={decision} ({reason})"
+        assigned = [
+            (chapter_idx, row_idx, handle, y)
+            for chapter_idx, chapter in enumerate(chapter_rows)
+            for row_idx, handle, y in chapter.rows
+        ]
+
+        with report.timed("extract_rows"):
+            extracted = await _bounded_gather(
+                limit,
+                (self._timed_extract(handle, row_idx, y, row_selector) for _, row_idx, handle, y in assigned),
             )
-            self.logger.log(info)
+
+        for (chapter_idx, _, _, _), (lesson, elapsed_ms) in zip(assigned, extracted):
+            if lesson is None:
+                continue
+            chapter = report.chapters[chapter_idx]
+            lesson.key = lesson_key(self.course, chapter.title, lesson.title, lesson.duration_label)
+            decision, reason = self._lesson_decision(lesson)
+            chapter.lessons_found += 1
             if decision == "PLAY":
-                valid += 1
+                chapter.valid += 1
             else:
-                skipped += 1
-        self.logger.log(f"Riepilogo capitolo: valide={valid}, escluse={skipped}")
+                chapter.skipped += 1
+            report.rows.append(
+                DiagnosticRow(
+                    chapter_index=chapter_idx,
+                    chapter_title=chapter.title,
+                    row_index=lesson.index,
+                    title=lesson.title,
+                    duration_label=lesson.duration_label,
+                    duration_seconds=lesson.duration_seconds,
+                    percentage=lesson.percentage,
+                    raw_percentage=lesson.raw_percentage,
+                    bbox_y=lesson.bbox_y,
+                    row_selector=lesson.selector,
+                    title_selector=lesson.field_selectors.get("title", ""),
+                    duration_selector=lesson.field_selectors.get("duration", ""),
+                    percentage_selector=lesson.field_selectors.get("percentage", ""),
+                    decision=decision,
+                    reason=reason,
+                    extract_ms=elapsed_ms,
+                )
+            )
+
+        for chapter in report.chapters:
+            self.logger.log(
+                f"Capitolo {chapter.index + 1}: '{chapter.title}' @ y={chapter.bbox_y:.2f} | "
+                f"righe={chapter.lessons_found}, valide={chapter.valid}, escluse={chapter.skipped}"
+            )
+        self.logger.log(
+            f"Righe analizzate: {len(report.rows)} su {self.row_index.total_rows} "
+            f"(selettore '{row_selector or '<nessuno>'}')"
+        )
+        try:
+            json_path, csv_path = report.export(config.report_dir)
+        except OSError as exc:
+            self.logger.log(f"Impossibile salvare il report diagnostico: {exc}")
+            return
+        self.logger.log(f"Report diagnostico: {json_path} | {csv_path} ({report.total_seconds():.2f}s)")
+
+    async def _timed_extract(
+        self, element: ElementHandle, idx: int, y: float, selector: str
+    ) -> tuple[Optional[LessonRow], float]:
+        start = time.perf_counter()
+        try:
+            lesson = await self._extract_lesson(element, idx, y, selector)
+        except Error as exc:
+            self.logger.log(f"Estrazione riga {idx + 1} fallita: {exc}")
+            lesson = None
+        return lesson, round((time.perf_counter() - start) * 1000, 3)
 
     async def _play_chapter(self, config: AutomationConfig, headers: list[ElementHandle], chapter_idx: int) -> None:
         self.logger.divider(f"CAPITOLO {chapter_idx + 1}")
+        self.status.enter_phase("render")
         header = headers[chapter_idx]
         title = (await self._safe_inner_text(header)).strip()
         self.logger.log(f"Titolo capitolo: {title}")
+        self.status.chapter_index, self.status.chapter_title = chapter_idx, title
         bbox = await header.bounding_box()
         if bbox:
             self.logger.log(f"Header bbox: y={bbox['y']:.2f}")
-        await self._ensure_expanded(headers, chapter_idx)
-        self.logger.log("Attesa render (5.5s)")
-        await asyncio.sleep(5.5)
+        rows_before = await self._count_lesson_rows()
+        if await self._ensure_expanded(headers, chapter_idx):
+            self.logger.log(f"Attesa render (max {self.timing.render_settle:.1f}s)")
+            await self._wait_for_render(rows_before)
+        else:
+            self.logger.log("Capitolo già espanso")
+        if self.tracer:
+            await self.tracer.snapshot(self.page, f"capitolo-{chapter_idx + 1}")
 
         lessons, (y_min, y_max) = await self._collect_lessons_in_chapter(headers, chapter_idx)
         self.logger.log(f"Range verticale: y_min={y_min:.2f}, y_max={'∞' if math.isinf(y_max) else f'{y_max:.2f}'}")
@@ -201,7 +575,7 @@ class AutomationRunner:
             self.logger.log(f"Nessuna lezione trovata, retry {attempts}/3 dopo scroll leggero")
             if bbox:
                 await self.page.mouse.wheel(0, 120)
-            await asyncio.sleep(1.5)
+            await asyncio.sleep(self.timing.rescan_delay)
             lessons, (y_min, y_max) = await self._collect_lessons_in_chapter(headers, chapter_idx)
 
         if not lessons:
@@ -211,34 +585,141 @@ class AutomationRunner:
                 "0 lezioni trovate dopo i tentativi: passo al capitolo successivo (scroll attuale: "
                 f"{scroll_top:.2f})"
             )
+            await self._persist_trace(f"zero-lezioni-capitolo-{chapter_idx + 1}")
+            self.state_manager.set_shortfalls(self.course, chapter_idx, [])
             self.state_manager.update(chapter_idx + 1, 0)
             return
 
         self.logger.log(f"Lezioni valide nel capitolo: {len(lessons)}")
-        state = self.state_manager.state
-        resume_from = state.lesson_index if state.chapter_index == chapter_idx else 0
-        if resume_from:
-            self.logger.log(f"Ripresa capitolo: salto le lezioni con indice < {resume_from + 1}")
-
-        for lesson_idx, lesson in enumerate(lessons):
-            if lesson_idx < resume_from:
-                self.logger.log(f"Ripresa: salto lezione indice {lesson_idx + 1}")
-                continue
-            decision, reason = self._lesson_decision(lesson)
+        for lesson in lessons:
+            lesson.key = lesson_key(self.course, title, lesson.title, lesson.duration_label)
+        decisions = [self._lesson_decision(lesson) for lesson in lessons]
+        self.state_manager.mark_completed(
+            self.course,
+            ((lesson.key, lesson.title) for lesson, (_, reason) in zip(lessons, decisions) if reason == "già completata"),
+        )
+        pending = [idx for idx, (decision, _) in enumerate(decisions) if decision == "PLAY"]
+        in_ledger = sum(1 for _, reason in decisions if reason == _LEDGER_REASON)
+        if in_ledger:
+            self.logger.log(f"Ledger: {in_ledger} lezioni già completate in esecuzioni precedenti")
+        if pending:
+            first = lessons[pending[0]]
+            self.logger.log(f"Prima lezione da riprodurre: {pending[0] + 1} '{first.title}'")
+
+        estimates = [
+            self._lesson_wait(config, lesson)[2] if decision == "PLAY" else 0.0
+            for lesson, (decision, _) in zip(lessons, decisions)
+        ]
+        played: list[tuple[int, LessonRow]] = []
+        for lesson_idx, (lesson, (decision, reason)) in enumerate(zip(lessons, decisions)):
             if decision != "PLAY":
-                self.logger.log(f"Skip lezione '{lesson.title}' - motivo: {reason}")
-                self._advance_state(chapter_idx, lesson_idx, len(lessons))
+                if reason != _LEDGER_REASON:
+                    self.logger.log(f"Skip lezione '{lesson.title}' - motivo: {reason}")
                 continue
+            await self._wait_while_paused()
             if await self._maybe_stop():
                 return
-            await self._play_lesson(config, chapter_idx, lesson_idx, lesson, len(lessons))
-
+            self.status.queued_wait = sum(estimates[lesson_idx + 1 :])
+            if await self._play_lesson(config, chapter_idx, lesson_idx, lesson, len(lessons)):
+                played.append((lesson_idx, lesson))
+
+        if played and not self.stop_event.is_set():
+            await self._verify_chapter(config, chapter_idx, played, len(lessons))
+        elif not self.stop_event.is_set():
+            # Nothing left to play: earlier shortfalls of this chapter are completed or gone.
+            self.state_manager.set_shortfalls(self.course, chapter_idx, [])
         self.state_manager.update(chapter_idx + 1, 0)
+        self.timing_store.save()
+
+    async def _verify_chapter(
+        self,
+        config: AutomationConfig,
+        chapter_idx: int,
+        played: list[tuple[int, LessonRow]],
+        total_lessons: int,
+    ) -> None:
+        self.logger.divider(f"VERIFICA CAPITOLO {chapter_idx + 1}")
+        self.status.enter_phase("verification")
+        pending = played
+        replayed: set[int] = set()
+        for round_idx in range(config.max_replays + 1):
+            percentages = await self._batch_percentages([lesson for _, lesson in pending])
+            short: list[tuple[int, LessonRow]] = []
+            for (lesson_idx, lesson), percentage in zip(pending, percentages):
+                ref = LessonRef(chapter_idx, lesson_idx, lesson.title, lesson.key, self.course)
+                if percentage < 100:
+                    self.logger.log(f"Lezione {ref.label()} al {percentage}%")
+                    short.append((lesson_idx, lesson))
+                elif lesson_idx in replayed:
+                    self.verification.replayed.append(ref)
+                else:
+                    self.verification.verified.append(ref)
+            pending = short
+            if not pending or round_idx == config.max_replays or self.stop_event.is_set():
+                break
+            self.logger.log(f"Replay {round_idx + 1}/{config.max_replays} di {len(pending)} lezioni incomplete")
+            for lesson_idx, lesson in pending:
+                replayed.add(lesson_idx)
+                self.status.queued_wait = 0.0
+                await self._play_lesson(config, chapter_idx, lesson_idx, lesson, total_lessons)
+
+        done = {lesson_idx for lesson_idx, _ in played} - {lesson_idx for lesson_idx, _ in pending}
+        self.state_manager.mark_completed(
+            self.course, ((lesson.key, lesson.title) for lesson_idx, lesson in played if lesson_idx in done)
+        )
+        failures = [LessonRef(chapter_idx, lesson_idx, lesson.title, lesson.key, self.course) for lesson_idx, lesson in pending]
+        self.verification.failed.extend(failures)
+        self.state_manager.set_shortfalls(self.course, chapter_idx, failures)
+        self.logger.log(f"Verifica capitolo: {len(played) - len(failures)}/{len(played)} complete")
+
+    async def _batch_percentages(self, lessons: list[LessonRow]) -> list[int]:
+        """Read the completion of several rows in a single round trip; detached rows count as 0%."""
+        assert self.page is not None
+        try:
+            results = await self.page.evaluate(
+                _BATCH_PERCENTAGE_SCRIPT, [[lesson.element for lesson in lessons], _PERCENTAGE_CHAIN]
+            )
+        except Error as exc:
+            self._check_page()
+            self.logger.log(f"Verifica batch fallita ({exc}), leggo le righe singolarmente")
+            return [await self._read_percentage(lesson.element) for lesson in lessons]
+        percentages = []
+        for result in results:
+            if result is None:
+                percentages.append(0)
+                continue
+            text, matched = result
+            if not matched:
+                fallback = _PERCENTAGE_REGEX.search(text or "")
+                text = fallback.group(0) if fallback else ""
+            percentages.append(_parse_percentage(text))
+        return percentages
+
+    async def _count_lesson_rows(self) -> int:
+        assert self.page is not None
+        with contextlib.suppress(Error):
+            return await self.page.locator(_LESSON_ROW_SELECTORS[0]).count()
+        return 0
+
+    async def _wait_for_render(self, rows_before: int) -> None:
+        """Wait until the lesson row count changes and holds for one poll, up to ``render_settle``."""
+        start = time.perf_counter()
+        last = rows_before
+        while (elapsed := time.perf_counter() - start) < self.timing.render_settle:
+            await asyncio.sleep(_RENDER_POLL)
+            count = await self._count_lesson_rows()
+            if count != rows_before and count == last:
+                self.timing_store.record(self.host, RENDER_SETTLE, elapsed)
+                self.logger.log(f"Render stabile dopo {elapsed:.2f}s ({count} righe)")
+                return
+            last = count
 
     def _lesson_decision(self, lesson: LessonRow) -> tuple[str, str]:
         lowered = lesson.title.lower()
         if "test di fine lezione" in lowered or "dispensa" in lowered:
             return "SKIP", "titolo escluso"
+        if lesson.key and self.state_manager.is_completed(lesson.key):
+            return "SKIP", _LEDGER_REASON
         if lesson.percentage >= 100:
             return "SKIP", "già completata"
         if math.isnan(lesson.duration_seconds) or lesson.duration_seconds <= 0:
@@ -252,42 +733,112 @@ class AutomationRunner:
         lesson_idx: int,
         lesson: LessonRow,
         total_lessons: int,
-    ) -> None:
-        base_wait = 20.0
-        residual = max(lesson.duration_seconds - base_wait, 0)
-        total_wait = min(base_wait + residual + config.buffer + config.after_play, config.max_wait)
+    ) -> bool:
+        base_wait, residual, total_wait = self._lesson_wait(config, lesson)
+        margin = self.timing.completion_margin
         self.logger.divider(f"LEZIONE {lesson_idx + 1}")
-        self.logger.log(
-            f"Titolo: {lesson.title}\nDurata: {lesson.duration_label} ({lesson.duration_seconds}s)\n"
-            f"Completamento: {lesson.raw_percentage}"
-        )
-        await self._click_with_retry(lesson.element)
-        self.state_manager.update(chapter_idx, lesson_idx)
-        self.logger.log(
-            f"Attese: base={base_wait}s + residuo={residual:.2f}s + buffer={config.buffer}s + after-play={config.after_play}s"
-        )
-        self.logger.log(f"Cap massimo attesa: {config.max_wait}s, totale applicato: {total_wait:.2f}s")
-        waited = 0.0
-        while waited < total_wait:
-            if await self._maybe_stop():
-                self.logger.log("Stop richiesto durante attesa lezione")
-                return
-            await asyncio.sleep(1.0)
-            waited += 1.0
-        self.logger.log("Attesa completata, passo alla prossima lezione")
-        self._advance_state(chapter_idx, lesson_idx, total_lessons)
+        phase = self.status.phase
+        self.status.enter_phase("lesson")
+        self.status.lesson_index, self.status.lesson_title = lesson_idx, lesson.title
+        self.control.skip_requested = False
+        try:
+            self.logger.log(
+                f"Titolo: {lesson.title}\nDurata: {lesson.duration_label} ({lesson.duration_seconds}s)\n"
+                f"Completamento: {lesson.raw_percentage}"
+            )
+            self.state_manager.update(chapter_idx, lesson_idx)
+            if not await self._click_with_retry(lesson.element):
+                self._check_page()
+                await self._persist_trace("click-fallito")
+                self.logger.log(f"Lezione '{lesson.title}' non avviata: click fallito, passo alla successiva")
+                self._advance_state(chapter_idx, lesson_idx, total_lessons)
+                return False
+            self.logger.log(
+                f"Attese: base={base_wait:.2f}s + residuo={residual:.2f}s (margine {margin:.2f}s) "
+                f"+ buffer={config.buffer}s + after-play={config.after_play}s"
+            )
+            self.logger.log(f"Cap massimo attesa: {config.max_wait}s, totale applicato: {total_wait:.2f}s")
+            self.status.wait_total = total_wait
+            waited = 0.0
+            completed_at: Optional[float] = None
+            next_poll = lesson.duration_seconds
+            while waited < total_wait:
+                if await self._maybe_stop():
+                    self.logger.log("Stop richiesto durante attesa lezione")
+                    return False
+                self._check_page()
+                if self.control.consume_skip():
+                    self.logger.log("Skip richiesto: lezione interrotta")
+                    self._advance_state(chapter_idx, lesson_idx, total_lessons)
+                    return False
+                await self._wait_while_paused()
+                await asyncio.sleep(1.0)
+                waited += 1.0
+                self.status.waited = waited
+                if completed_at is None and waited >= next_poll:
+                    next_poll = waited + self.timing.completion_poll
+                    if await self._read_percentage(lesson.element) >= 100:
+                        completed_at = waited
+            self._record_completion(lesson, completed_at)
+            self.logger.log("Attesa completata, passo alla prossima lezione")
+            self._advance_state(chapter_idx, lesson_idx, total_lessons)
+            return True
+        finally:
+            self.status.wait_total = self.status.waited = 0.0
+            self.status.enter_phase(phase)
+
+    def _lesson_wait(self, config: AutomationConfig, lesson: LessonRow) -> tuple[float, float, float]:
+        base_wait = self.timing.base_wait
+        residual = max(lesson.duration_seconds + self.timing.completion_margin - base_wait, 0)
+        total_wait = min(base_wait + residual + config.buffer + config.after_play, config.max_wait)
+        return base_wait, residual, total_wait
+
+    def _record_completion(self, lesson: LessonRow, completed_at: Optional[float]) -> None:
+        # Only observed completions are samples: the full wait depends on the current profile and would feed back into it.
+        if completed_at is None:
+            self.logger.log("Completamento 100% non osservato durante l'attesa")
+            return
+        self.logger.log(f"Completamento 100% osservato dopo {completed_at:.0f}s")
+        self.state_manager.mark_completed(self.course, [(lesson.key, lesson.title)])
+        self.timing_store.record(self.host, COMPLETION_LAG, max(completed_at - lesson.duration_seconds, 0.0))
+        if lesson.duration_seconds < TimingProfile().base_wait:
+            self.timing_store.record(self.host, SHORT_COMPLETION, completed_at)
 
-    async def _click_with_retry(self, element: ElementHandle, retries: int = 3) -> None:
+    async def _read_percentage(self, element: ElementHandle) -> int:
+        with contextlib.suppress(Error):
+            label, _ = await self._find_text_match(element, _PERCENTAGE_SELECTORS, fallback_regex=_PERCENTAGE_REGEX)
+            return _parse_percentage(label)
+        return 0
+
+    async def _click_with_retry(self, element: ElementHandle) -> bool:
+        policy = self._backoff()
+        retries = policy.max_attempts
         for attempt in range(1, retries + 1):
+            self._check_page()
             try:
                 await element.scroll_into_view_if_needed()
-                await element.click(timeout=5_000)
+                start = time.perf_counter()
+                await element.click(timeout=self.timing.click_timeout * 1000)
+                self.timing_store.record(self.host, CLICK, time.perf_counter() - start)
                 self.logger.log(f"Click riga lezione riuscito (tentativo {attempt}/{retries})")
-                return
+                return True
             except Error as exc:
                 self.logger.log(f"Click fallito tentativo {attempt}/{retries}: {exc}")
-                await asyncio.sleep(0.8 * attempt)
+                if attempt < retries:
+                    await asyncio.sleep(policy.delay(attempt))
         self.logger.log("Click fallito dopo tutti i tentativi")
+        return False
+
+    async def _wait_while_paused(self) -> None:
+        if not self.control.paused:
+            return
+        phase = self.status.phase
+        self.status.enter_phase("paused")
+        self.logger.log("Esecuzione in pausa")
+        while self.control.paused and not self.stop_event.is_set():
+            await asyncio.sleep(0.5)
+        self.status.enter_phase(phase)
+        self.logger.log("Esecuzione ripresa")
 
     async def _maybe_stop(self) -> bool:
         if self.stop_event.is_set():
@@ -301,13 +852,18 @@ class AutomationRunner:
         else:
             self.state_manager.update(chapter_idx + 1, 0)
 
-    async def _ensure_expanded(self, headers: list[ElementHandle], index: int) -> None:
+    async def _ensure_expanded(self, headers: list[ElementHandle], index: int) -> bool:
+        """Open the chapter unless ``aria-expanded`` says it already is; return True if the header was clicked."""
         assert self.page is not None
         header = headers[index]
+        with contextlib.suppress(Error):
+            if await header.get_attribute("aria-expanded") == "true":
+                return False
         await header.scroll_into_view_if_needed()
         with contextlib.suppress(Error):
             await header.click()
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(self.timing.expand_delay)
+        return True
 
     async def _collect_chapter_headers(self) -> list[ElementHandle]:
         assert self.page is not None
@@ -325,45 +881,28 @@ class AutomationRunner:
             if count:
                 handles = await locator.element_handles()
                 if handles:
+                    self.header_selector = selector
                     break
         if not handles:
-            handles = await self.page.locator("button, div[role='button']").element_handles()
+            self.header_selector = _HEADER_FALLBACK_SELECTOR
+            handles = await self.page.locator(_HEADER_FALLBACK_SELECTOR).element_handles()
         return handles
 
     async def _collect_lessons_in_chapter(
         self, headers: list[ElementHandle], chapter_idx: int
     ) -> tuple[list[LessonRow], tuple[float, float]]:
-        assert self.page is not None
-        header = headers[chapter_idx]
-        bbox = await header.bounding_box()
-        y_min = bbox["y"] if bbox else float("-inf")
-        if chapter_idx + 1 < len(headers):
-            next_bbox = await headers[chapter_idx + 1].bounding_box()
-            y_max = next_bbox["y"] if next_bbox else float("inf")
-        else:
-            y_max = float("inf")
-
-        lessons_selector = "div.cursor-pointer"
-        fallback_selector = "div:has(div.cursor-pointer)"
-        locator = self.page.locator(lessons_selector)
-        handles = await locator.element_handles()
-        if not handles:
-            handles = await self.page.locator(fallback_selector).element_handles()
+        assert self.row_index is not None
+        chapter = await self.row_index.chapter_rows(headers, chapter_idx)
+        if chapter.rebuilt:
+            self.logger.log(f"Righe lezione rilette: {self.row_index.total_rows} righe")
         lessons: list[LessonRow] = []
-        for idx, element in enumerate(handles):
-            bbox_row = await element.bounding_box()
-            if not bbox_row:
-                continue
-            y = bbox_row["y"]
-            if not (y_min <= y < y_max):
-                continue
-            lesson = await self._extract_lesson(element, idx, y)
-            lessons.append(lesson)
-        return lessons, (y_min, y_max)
+        for idx, element, y in chapter.rows:
+            lessons.append(await self._extract_lesson(element, idx, y, self.row_index.selector))
+        return lessons, (chapter.y_min, chapter.y_max)
 
-    async def _extract_lesson(self, element: ElementHandle, idx: int, y: float) -> LessonRow:
-        title = await self._find_text(element, ["div.mb-2", "div.font-medium", "h3", "span"])
-        duration_label = await self._find_text(
+    async def _extract_lesson(self, element: ElementHandle, idx: int, y: float, selector: str = "") -> LessonRow:
+        title, title_selector = await self._find_text_match(element, ["div.mb-2", "div.font-medium", "h3", "span"])
+        duration_label, duration_selector = await self._find_text_match(
             element,
             [
                 "div.text-sm.text-platform-gray",
@@ -373,15 +912,8 @@ class AutomationRunner:
             ],
             fallback_regex=_TIME_REGEX,
         )
-        percentage_label = await self._find_text(
-            element,
-            [
-                "div.w-1/12.text-xs",
-                "div.text-xs",
-                "span.text-xs",
-                "span:has-text('%')",
-            ],
-            fallback_regex=re.compile(r"\b(\d{1,3})%"),
+        percentage_label, percentage_selector = await self._find_text_match(
+            element, _PERCENTAGE_SELECTORS, fallback_regex=_PERCENTAGE_REGEX
         )
         duration_seconds = _parse_duration(duration_label)
         percentage = _parse_percentage(percentage_label)
@@ -394,26 +926,33 @@ class AutomationRunner:
             raw_percentage=percentage_label,
             bbox_y=y,
             index=idx,
+            selector=selector,
+            field_selectors={
+                "title": title_selector,
+                "duration": duration_selector,
+                "percentage": percentage_selector,
+            },
         )
 
-    async def _find_text(
+    async def _find_text_match(
         self,
         element: ElementHandle,
         selectors: Iterable[str],
         fallback_regex: Optional[re.Pattern[str]] = None,
-    ) -> str:
+    ) -> tuple[str, str]:
+        """Return the text found and the selector that produced it ("regex" for the fallback)."""
         for selector in selectors:
             locator = element.locator(selector)
             if await locator.count():
                 text = (await locator.first.inner_text()).strip()
                 if text:
-                    return text
+                    return text, selector
         if fallback_regex:
             text = await element.inner_text()
             match = fallback_regex.search(text)
             if match:
-                return match.group(0)
-        return ""
+                return match.group(0), "regex"
+        return "", ""
 
     async def _safe_inner_text(self, handle: ElementHandle) -> str:
         with contextlib.suppress(Error):
@@ -421,6 +960,26 @@ class AutomationRunner:
         return ""
 
 
+def _recoverable_reason(exc: BaseException) -> Optional[str]:
+    """Recovery reason for faults a page reload can fix (timeouts, detached elements); None otherwise."""
+    if isinstance(exc, PlaywrightTimeoutError):
+        return "timeout"
+    message = str(exc).lower()
+    if any(marker in message for marker in _DETACHED_MARKERS):
+        return "elemento-staccato"
+    return None
+
+
+async def _bounded_gather(limit: int, awaitables: Iterable[Awaitable[T]]) -> list[T]:
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return list(await asyncio.gather(*(_run(awaitable) for awaitable in awaitables)))
+
+
 def _parse_duration(label: str) -> float:
     match = _TIME_REGEX.search(label)
     if not match:
@@ -0,0 +1,75 @@
+"""Import-time regression benchmark for the headless entry point.
+
+    python -m automation.bench_import --runs 10 --budget-ms 100
+
+Each command runs in a fresh interpreter; the reported overhead is its median wall time minus
+the median of a bare ``python -c pass``. Exits with status 1 if a command goes over budget or
+imports a module that headless use must not load.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+FORBIDDEN_MODULES = ("tkinter", "playwright")
+COMMANDS = {
+    "help": ["-m", "automation", "--help"],
+    "status": ["-m", "automation", "--status"],
+    "check": ["-m", "automation", "https://example.invalid/corso", "--no-use-profile", "--check"],
+    "plan": ["-m", "automation", "https://example.invalid/corso", "--no-use-profile", "--plan"],
+}
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _median_ms(argv: list[str], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=PACKAGE_ROOT, capture_output=True, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _loaded_forbidden(argv: list[str]) -> list[str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=PACKAGE_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    loaded = set()
+    for line in result.stderr.splitlines():
+        name = line.rsplit("|", 1)[-1].strip()
+        root = name.split(".", 1)[0]
+        if root in FORBIDDEN_MODULES:
+            loaded.add(root)
+    return sorted(loaded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del tempo di import dell'entry point headless")
+    parser.add_argument("--runs", type=int, default=10, help="Esecuzioni per comando")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="Overhead massimo ammesso oltre l'interprete")
+    args = parser.parse_args()
+
+    baseline = _median_ms(["-c", "pass"], args.runs)
+    print(f"interprete: {baseline:.1f} ms")
+    failed = False
+    for name, argv in COMMANDS.items():
+        overhead = _median_ms(argv, args.runs) - baseline
+        forbidden = _loaded_forbidden(argv)
+        ok = overhead <= args.budget_ms and not forbidden
+        failed |= not ok
+        extra = f" | importati: {', '.join(forbidden)}" if forbidden else ""
+        print(f"{name}: +{overhead:.1f} ms{extra} [{'OK' if ok else 'REGRESSIONE'}]")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
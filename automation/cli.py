@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import argparse
-import asyncio
+import json
+import os
 from pathlib import Path
+from urllib.parse import urlparse
 
-from .automation_runner import AutomationRunner
 from .config import AutomationConfig
 from .logger import Logger
-from .state import StateManager
+from .state import StateManager, course_id
+from .timing import TimingStore
+
+CONTROL_TOKEN_ENV = "AUTOMATION_CONTROL_TOKEN"
 
 
 class StdoutSink:
@@ -15,9 +19,19 @@ class StdoutSink:
         print(message)
 
 
+def parse_timing_override(value: str) -> tuple[str, float]:
+    name, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("Formato atteso: NOME=SECONDI")
+    try:
+        return name.strip(), float(raw)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Valore non numerico per {name}: {raw}") from exc
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Automazione corsi con Playwright")
-    parser.add_argument("url", help="URL del corso da aprire")
+    parser.add_argument("url", nargs="?", default="", help="URL del corso da aprire")
     parser.add_argument("--start-chapter", type=int, default=1, help="Capitolo di partenza (1-based)")
     parser.add_argument("--headless", action="store_true", help="Esegue Playwright in headless")
     parser.add_argument("--after-play", type=float, default=0.0, help="Attesa extra dopo la riproduzione")
@@ -42,11 +56,94 @@ def build_parser() -> argparse.ArgumentParser:
         default=3600.0,
         help="Tempo massimo di attesa per singola lezione",
     )
+    parser.add_argument(
+        "--report-dir",
+        type=Path,
+        default=None,
+        help="Cartella dove esportare il report diagnostico (JSON e CSV)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Operazioni DOM parallele in modalità diagnostica",
+    )
+    parser.add_argument(
+        "--adaptive-timing",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Calibra attese e timeout dalla telemetria delle esecuzioni precedenti",
+    )
+    parser.add_argument(
+        "--timing",
+        type=parse_timing_override,
+        action="append",
+        default=[],
+        metavar="NOME=SECONDI",
+        help="Forza un parametro di timing (es. render_settle=3), ripetibile",
+    )
+    parser.add_argument(
+        "--max-recoveries",
+        type=int,
+        default=5,
+        help="Recovery automatici massimi dopo crash o chiusura della pagina",
+    )
+    parser.add_argument(
+        "--max-replays",
+        type=int,
+        default=1,
+        help="Replay massimi delle lezioni che non risultano al 100%% dopo la verifica",
+    )
+    parser.add_argument(
+        "--rolling-trace",
+        action="store_true",
+        help="Traccia Playwright a buffer circolare, salvata solo in caso di errore",
+    )
+    parser.add_argument(
+        "--trace-window",
+        type=float,
+        default=5.0,
+        help="Minuti di tracing conservati nel buffer circolare",
+    )
+    parser.add_argument(
+        "--trace-dir",
+        type=Path,
+        default=None,
+        help="Cartella per buffer e tracce salvate",
+    )
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=None,
+        help="Avvia l'API locale di stato/controllo su questa porta (0 = porta libera)",
+    )
+    parser.add_argument(
+        "--control-host",
+        default="127.0.0.1",
+        help="Indirizzo di ascolto dell'API di controllo",
+    )
+    parser.add_argument(
+        "--control-token",
+        default=os.environ.get(CONTROL_TOKEN_ENV) or None,
+        help=f"Token richiesto dall'API di controllo, obbligatorio se l'host non è locale (default: ${CONTROL_TOKEN_ENV})",
+    )
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument("--check", action="store_true", help="Valida la configurazione ed esce")
+    commands.add_argument(
+        "--plan",
+        action="store_true",
+        help="Mostra punto di ripresa e profilo timing senza aprire il browser",
+    )
+    commands.add_argument(
+        "--status",
+        action="store_true",
+        help="Mostra lo stato salvato (o quello del runner su --control-port) ed esce",
+    )
     return parser
 
 
-def run_cli(args: argparse.Namespace) -> None:
-    config = AutomationConfig(
+def build_config(args: argparse.Namespace) -> AutomationConfig:
+    return AutomationConfig(
         url=args.url,
         start_chapter=args.start_chapter,
         headless=args.headless,
@@ -57,11 +154,84 @@ def run_cli(args: argparse.Namespace) -> None:
         user_data_dir=args.user_data_dir,
         diagnostic_mode=args.diagnostic,
         max_wait=args.max_wait,
+        report_dir=args.report_dir,
+        diagnostic_concurrency=args.concurrency,
+        adaptive_timing=args.adaptive_timing,
+        timing_overrides=dict(args.timing),
+        max_recoveries=args.max_recoveries,
+        max_replays=args.max_replays,
+        rolling_trace=args.rolling_trace,
+        trace_window=args.trace_window,
+        trace_dir=args.trace_dir,
+        control_port=args.control_port,
+        control_host=args.control_host,
+        control_token=args.control_token,
+    )
+
+
+def print_status(args: argparse.Namespace) -> None:
+    if args.control_port is not None:
+        from urllib.error import URLError
+        from urllib.request import Request, urlopen
+
+        endpoint = f"http://{args.control_host}:{args.control_port}/status"
+        headers = {"X-Control-Token": args.control_token} if args.control_token else {}
+        try:
+            with urlopen(Request(endpoint, headers=headers), timeout=2) as response:
+                print(json.dumps(json.load(response), indent=2, ensure_ascii=False))
+        except (URLError, OSError) as exc:
+            raise SystemExit(f"Runner non raggiungibile su {endpoint}: {exc}") from exc
+        return
+    manager = StateManager()
+    state = manager.state
+    course = course_id(args.url) if args.url else None
+    shortfalls = manager.pending_shortfalls(course)
+    print(f"Ripresa: capitolo {state.chapter_index + 1}")
+    if course is None:
+        print(f"Lezioni completate nel ledger: {len(state.ledger)}")
+    else:
+        print(f"Lezioni completate nel ledger per {course}: {manager.completed_count(course)}")
+    print(f"Lezioni incomplete registrate: {len(shortfalls)}")
+    for ref in shortfalls:
+        print(f"  {ref.label()}")
+
+
+def print_plan(config: AutomationConfig) -> None:
+    manager = StateManager()
+    state = manager.state
+    host = urlparse(config.url).hostname or config.url
+    profile = TimingStore().profile_for(host, config.timing_overrides, config.adaptive_timing)
+    start_chapter = max(config.start_chapter - 1, state.chapter_index)
+    print(config.as_log_summary())
+    course = course_id(config.url)
+    print(
+        f"Primo capitolo da eseguire: {start_chapter + 1} "
+        f"({manager.completed_count(course)} lezioni del corso già nel ledger)"
     )
+    print(f"Lezioni incomplete registrate: {len(manager.pending_shortfalls(course))}")
+    print(f"Profilo timing per {host}:\n{profile.as_log_summary()}")
+
+
+def run_cli(args: argparse.Namespace) -> None:
+    if args.status:
+        print_status(args)
+        return
+    config = build_config(args)
     try:
         config.ensure_valid()
     except ValueError as exc:
         raise SystemExit(f"Configurazione non valida: {exc}") from exc
+    if args.check:
+        print("Configurazione valida")
+        return
+    if args.plan:
+        print_plan(config)
+        return
+
+    # asyncio and Playwright are only imported once a browser is actually needed.
+    import asyncio
+
+    from .automation_runner import AutomationRunner
 
     logger = Logger(StdoutSink())
     stop_event = asyncio.Event()
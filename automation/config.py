@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import ipaddress
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+from .timing import validate_overrides
+
 
 @dataclass(slots=True)
 class AutomationConfig:
@@ -19,6 +22,18 @@ class AutomationConfig:
     user_data_dir: Optional[Path]
     diagnostic_mode: bool
     max_wait: float = 3600.0
+    report_dir: Optional[Path] = None
+    diagnostic_concurrency: int = 8
+    adaptive_timing: bool = True
+    timing_overrides: dict[str, float] = field(default_factory=dict)
+    max_recoveries: int = 5
+    max_replays: int = 1
+    rolling_trace: bool = False
+    trace_window: float = 5.0
+    trace_dir: Optional[Path] = None
+    control_port: Optional[int] = None
+    control_host: str = "127.0.0.1"
+    control_token: Optional[str] = None
 
     def as_log_summary(self) -> str:
         profile = str(self.user_data_dir) if self.user_data_dir else "<none>"
@@ -32,7 +47,15 @@ class AutomationConfig:
             "Max wait={max_wait} s\n"
             "Chrome profile enabled={use_profile}\n"
             "User data dir={profile}\n"
-            "Diagnostic mode={diagnostic}"
+            "Diagnostic mode={diagnostic}\n"
+            "Diagnostic concurrency={concurrency}\n"
+            "Report dir={report_dir}\n"
+            "Adaptive timing={adaptive}\n"
+            "Timing overrides={overrides}\n"
+            "Max recoveries={max_recoveries}\n"
+            "Max replays={max_replays}\n"
+            "Rolling trace={rolling_trace} (finestra {trace_window} min, dir {trace_dir})\n"
+            "Control API={control}"
         ).format(
             url=self.url,
             chapter=self.start_chapter,
@@ -44,6 +67,20 @@ class AutomationConfig:
             use_profile=self.use_profile,
             profile=profile,
             diagnostic=self.diagnostic_mode,
+            concurrency=self.diagnostic_concurrency,
+            report_dir=str(self.report_dir) if self.report_dir else "<default>",
+            adaptive=self.adaptive_timing,
+            overrides=", ".join(f"{k}={v}" for k, v in self.timing_overrides.items()) or "<none>",
+            max_recoveries=self.max_recoveries,
+            max_replays=self.max_replays,
+            rolling_trace=self.rolling_trace,
+            trace_window=self.trace_window,
+            trace_dir=str(self.trace_dir) if self.trace_dir else "<default>",
+            control=(
+                f"{self.control_host}:{self.control_port} (token {'sì' if self.control_token else 'no'})"
+                if self.control_port is not None
+                else "<off>"
+            ),
         )
 
     def ensure_valid(self) -> None:
@@ -59,8 +96,30 @@ class AutomationConfig:
             raise ValueError("Lo slow-mo non può essere negativo")
         if self.max_wait <= 0:
             raise ValueError("Il tempo massimo deve essere > 0")
+        if self.diagnostic_concurrency < 1:
+            raise ValueError("La concorrenza diagnostica deve essere >= 1")
+        validate_overrides(self.timing_overrides)
+        if self.max_recoveries < 0:
+            raise ValueError("Il numero massimo di recovery non può essere negativo")
+        if self.max_replays < 0:
+            raise ValueError("Il numero massimo di replay non può essere negativo")
+        if self.trace_window <= 0:
+            raise ValueError("La finestra di tracing deve essere > 0")
+        if self.control_port is not None and not 0 <= self.control_port <= 65535:
+            raise ValueError("Porta API di controllo non valida")
+        if self.control_port is not None and not self.control_token and not is_loopback(self.control_host):
+            raise ValueError("Un'API di controllo non locale richiede un token (--control-token)")
         if self.use_profile:
             if not self.user_data_dir:
                 raise ValueError("Seleziona una cartella profilo Chrome valida")
             if not self.user_data_dir.exists():
                 raise ValueError("La cartella profilo indicata non esiste")
+
+
+def is_loopback(host: str) -> bool:
+    if host.casefold() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hmac
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .logger import LogSink
+from .status import RunControl, RunStatus
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+}
+_READ_TIMEOUT = 5.0
+
+
+class LogBroadcast:
+    """Log sink that forwards to ``inner`` and keeps the last lines as structured entries for the API."""
+
+    def __init__(self, inner: LogSink, status: RunStatus, capacity: int = 1000) -> None:
+        self.inner = inner
+        self.status = status
+        self.entries: deque[dict[str, Any]] = deque(maxlen=capacity)
+        self.seq = 0
+        self._subscribers: set[asyncio.Queue[dict[str, Any]]] = set()
+
+    def write(self, message: str) -> None:
+        self.inner.write(message)
+        self.seq += 1
+        entry = {
+            "seq": self.seq,
+            "ts": round(time.time(), 3),
+            "phase": self.status.phase,
+            "chapter": self.status.chapter_index + 1,
+            "lesson": self.status.lesson_index + 1,
+            "message": message,
+        }
+        self.entries.append(entry)
+        for queue in self._subscribers:
+            with contextlib.suppress(asyncio.QueueFull):
+                queue.put_nowait(entry)
+
+    def since(self, seq: int) -> list[dict[str, Any]]:
+        return [entry for entry in self.entries if entry["seq"] > seq]
+
+    def subscribe(self) -> asyncio.Queue[dict[str, Any]]:
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=1000)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[dict[str, Any]]) -> None:
+        self._subscribers.discard(queue)
+
+
+class ControlServer:
+    """Minimal HTTP endpoint on the runner's own event loop.
+
+    GET  /status, /metrics, /logs?since=N, /logs/stream (server-sent events)
+    POST /stop, /pause, /resume, /skip
+
+    With a ``token`` every request must carry it (``X-Control-Token``, ``Authorization: Bearer`` or
+    ``?token=``). POSTs with a foreign ``Origin`` are always rejected, so web pages open in a local
+    browser cannot drive the runner.
+    """
+
+    def __init__(
+        self,
+        status: RunStatus,
+        control: RunControl,
+        stop_event: asyncio.Event,
+        logs: LogBroadcast,
+        metrics: Callable[[], dict[str, Any]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: Optional[str] = None,
+    ) -> None:
+        self.status = status
+        self.control = control
+        self.stop_event = stop_event
+        self.logs = logs
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.token = token
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._handlers: set[asyncio.Task[Any]] = set()
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+        # Open connections (log streams, idle clients) would otherwise keep wait_closed() waiting.
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        if handlers:
+            await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server:
+            with contextlib.suppress(Exception):
+                await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._handlers.add(task)
+        try:
+            await self._serve(reader, writer)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), _READ_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            await self._respond(writer, 400, {"error": "richiesta non valida"})
+            return
+        headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if not self._authorized(headers, query):
+            await self._respond(writer, 401, {"error": "token mancante o non valido"})
+            return
+        origin = headers.get("origin")
+        if method == "POST" and origin and origin != f"http://{headers.get('host', '')}":
+            await self._respond(writer, 403, {"error": "origine non ammessa"})
+            return
+        if method == "GET" and url.path == "/logs/stream":
+            await self._stream_logs(writer)
+            return
+        code, payload = self._route(method, url.path, query)
+        await self._respond(writer, code, payload)
+
+    def _authorized(self, headers: dict[str, str], query: dict[str, list[str]]) -> bool:
+        if not self.token:
+            return True
+        supplied = headers.get("x-control-token") or query.get("token", [""])[0]
+        scheme, _, credentials = headers.get("authorization", "").partition(" ")
+        if not supplied and scheme.lower() == "bearer":
+            supplied = credentials.strip()
+        return hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8"))
+
+    def _route(self, method: str, path: str, query: dict[str, list[str]]) -> tuple[int, dict[str, Any]]:
+        if method == "GET":
+            if path == "/status":
+                return 200, {**self.status.as_dict(), "paused": self.control.paused}
+            if path == "/metrics":
+                return 200, {**self.status.metrics(), **self.metrics()}
+            if path == "/logs":
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                except ValueError:
+                    return 400, {"error": "since deve essere un intero"}
+                return 200, {"last": self.logs.seq, "entries": self.logs.since(since)}
+            return 404, {"error": "risorsa sconosciuta"}
+        if method == "POST":
+            if path == "/stop":
+                self.stop_event.set()
+            elif path == "/pause":
+                self.control.paused = True
+            elif path == "/resume":
+                self.control.paused = False
+            elif path == "/skip":
+                if self.status.wait_total <= 0:
+                    return 409, {"error": "nessuna lezione in corso"}
+                self.control.skip_requested = True
+            else:
+                return 404, {"error": "comando sconosciuto"}
+            return 200, {"ok": True, "command": path.lstrip("/")}
+        return 405, {"error": "metodo non supportato"}
+
+    async def _respond(self, writer: asyncio.StreamWriter, code: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {code} {_REASONS.get(code, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+        writer.close()
+
+    async def _stream_logs(self, writer: asyncio.StreamWriter) -> None:
+        queue = self.logs.subscribe()
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            await writer.drain()
+            while True:
+                entry = await queue.get()
+                writer.write(f"id: {entry['seq']}\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n".encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.logs.unsubscribe(queue)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import contextlib
+import csv
+import datetime as _dt
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+REPORT_DIR = Path(__file__).with_name("reports")
+
+
+@dataclass(slots=True)
+class DiagnosticChapter:
+    index: int
+    title: str
+    bbox_y: float
+    lessons_found: int = 0
+    valid: int = 0
+    skipped: int = 0
+
+
+@dataclass(slots=True)
+class DiagnosticRow:
+    chapter_index: int
+    chapter_title: str
+    row_index: int
+    title: str
+    duration_label: str
+    duration_seconds: float
+    percentage: int
+    raw_percentage: str
+    bbox_y: float
+    row_selector: str
+    title_selector: str
+    duration_selector: str
+    percentage_selector: str
+    decision: str
+    reason: str
+    extract_ms: float
+
+
+@dataclass(slots=True)
+class DiagnosticStep:
+    name: str
+    seconds: float
+
+
+@dataclass(slots=True)
+class DiagnosticReport:
+    """Machine-readable result of a diagnostic walk over a whole course."""
+
+    url: str
+    header_selector: str = ""
+    header_fallback: bool = False
+    started_at: str = field(default_factory=lambda: _dt.datetime.now().isoformat(timespec="seconds"))
+    chapters: list[DiagnosticChapter] = field(default_factory=list)
+    rows: list[DiagnosticRow] = field(default_factory=list)
+    steps: list[DiagnosticStep] = field(default_factory=list)
+
+    @contextlib.contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append(DiagnosticStep(name, time.perf_counter() - start))
+
+    def total_seconds(self) -> float:
+        return sum(step.seconds for step in self.steps)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "url": self.url,
+            "started_at": self.started_at,
+            "header_selector": self.header_selector,
+            "header_fallback": self.header_fallback,
+            "total_seconds": self.total_seconds(),
+            "chapters": [_clean(asdict(chapter)) for chapter in self.chapters],
+            "rows": [_clean(asdict(row)) for row in self.rows],
+            "steps": [asdict(step) for step in self.steps],
+        }
+
+    def write_json(self, path: Path) -> None:
+        path.write_text(json.dumps(self.as_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def write_csv(self, path: Path) -> None:
+        columns = [f.name for f in fields(DiagnosticRow)]
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=columns)
+            writer.writeheader()
+            for row in self.rows:
+                writer.writerow(_clean(asdict(row)))
+
+    def export(self, directory: Optional[Path] = None) -> tuple[Path, Path]:
+        target = directory or REPORT_DIR
+        target.mkdir(parents=True, exist_ok=True)
+        stamp = self.started_at.replace(":", "").replace("-", "")
+        json_path = target / f"diagnostic-{stamp}.json"
+        csv_path = target / f"diagnostic-{stamp}.csv"
+        self.write_json(json_path)
+        self.write_csv(csv_path)
+        return json_path, csv_path
+
+
+def _clean(data: dict[str, object]) -> dict[str, object]:
+    # JSON has no NaN/inf: unparsable durations and missing boxes become null.
+    return {
+        key: None if isinstance(value, float) and not math.isfinite(value) else value
+        for key, value in data.items()
+    }
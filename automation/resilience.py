@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class PageLostError(Exception):
+    """The page crashed or was closed while the runner was still using it."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Pagina persa ({reason})")
+        self.reason = reason
+
+
+class CircuitOpenError(Exception):
+    """Navigation to a host is suspended until the breaker cools down."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"Circuit breaker aperto per {host}")
+        self.host = host
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class BackoffPolicy:
+    """Exponential backoff with jitter: attempt n waits base * factor**(n-1), randomly shortened by up to ``jitter``."""
+
+    base: float = 0.8
+    factor: float = 2.0
+    max_delay: float = 30.0
+    jitter: float = 0.5
+    max_attempts: int = 3
+    rng: random.Random = field(default_factory=random.Random)
+
+    def delay(self, attempt: int) -> float:
+        raw = min(self.max_delay, self.base * self.factor ** max(attempt - 1, 0))
+        return raw * (1 - self.jitter * self.rng.random())
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    failure_threshold: int = 3
+    cooldown: float = 60.0
+    clock: Callable[[], float] = time.monotonic
+    failures: int = 0
+    opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.cooldown - (self.clock() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        # A failed probe while half-open re-opens immediately.
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = self.clock()
+
+
+class CircuitBreakers:
+    """One breaker per host, created on first use."""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0) -> None:
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def for_host(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self._failure_threshold, self._cooldown)
+            self._breakers[host] = breaker
+        return breaker
+
+
+@dataclass(slots=True)
+class RecoveryEvent:
+    reason: str
+    seconds: float
+    success: bool
+
+
+@dataclass(slots=True)
+class RecoveryMetrics:
+    events: list[RecoveryEvent] = field(default_factory=list)
+
+    def record(self, reason: str, seconds: float, success: bool) -> None:
+        self.events.append(RecoveryEvent(reason, seconds, success))
+
+    def as_log_summary(self) -> str:
+        if not self.events:
+            return "Nessun recovery necessario"
+        recovered = [event.seconds for event in self.events if event.success]
+        failed = len(self.events) - len(recovered)
+        mean = sum(recovered) / len(recovered) if recovered else 0.0
+        worst = max(recovered, default=0.0)
+        return (
+            f"Recovery: {len(recovered)} riusciti, {failed} falliti | "
+            f"tempo medio={mean:.2f}s, massimo={worst:.2f}s"
+        )
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from playwright.async_api import ElementHandle, Page
+
+# Returns the visible lesson rows between a chapter header and the next one in document order.
+# The document-ordered row list is cached in the page and rebuilt only when a MutationObserver,
+# installed once on the closest common ancestor of the headers, reports added or removed nodes.
+# The chapter boundaries are found by bisecting that list with compareDocumentPosition, so only
+# the chapter's own rows cross the protocol and layout shifts cannot misassign them.
+_CHAPTER_ROWS_SCRIPT = """([selectors, header, next]) => {
+    const anchors = [header, next].filter((node) => node && node.isConnected);
+    let state = window.__lessonRowIndex;
+    if (!state || !state.scope.isConnected) {
+        let scope = anchors.length > 1 ? anchors[0].parentElement : document.body;
+        while (scope && !anchors.every((node) => scope.contains(node))) scope = scope.parentElement;
+        scope = scope || document.documentElement;
+        if (state) state.observer.disconnect();
+        state = window.__lessonRowIndex = { version: 0, built: -1, scope, nodes: [], selector: "" };
+        state.observer = new MutationObserver(() => { state.version += 1; });
+        state.observer.observe(scope, { childList: true, subtree: true });
+    }
+    const rebuilt = state.built !== state.version || !state.nodes.length
+        || !state.nodes.every((node) => node.isConnected);
+    if (rebuilt) {
+        state.nodes = [];
+        state.selector = "";
+        for (const selector of selectors) {
+            const found = document.querySelectorAll(selector);
+            if (found.length) {
+                state.nodes = Array.from(found);
+                state.selector = selector;
+                break;
+            }
+        }
+        state.built = state.version;
+    }
+    const nodes = state.nodes;
+    const after = (node) => {
+        let lo = 0;
+        let hi = nodes.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (node.compareDocumentPosition(nodes[mid]) & Node.DOCUMENT_POSITION_FOLLOWING) hi = mid;
+            else lo = mid + 1;
+        }
+        return lo;
+    };
+    const top = (node) => {
+        if (!node || !node.isConnected) return null;
+        const rect = node.getBoundingClientRect();
+        if (rect.width === 0 && rect.height === 0) return null;
+        return rect.top + window.scrollY;
+    };
+    const start = header && header.isConnected ? after(header) : 0;
+    const end = next && next.isConnected ? Math.max(after(next), start) : nodes.length;
+    const rows = [];
+    const indices = [];
+    const offsets = [];
+    for (let idx = start; idx < end; idx++) {
+        const offset = top(nodes[idx]);
+        if (offset === null) continue;
+        rows.push(nodes[idx]);
+        indices.push(idx);
+        offsets.push(offset);
+    }
+    rows.meta = { selector: state.selector, total: nodes.length, rebuilt, indices, offsets, bounds: [top(header), top(next)] };
+    return rows;
+}"""
+
+
+@dataclass(slots=True)
+class ChapterRows:
+    """Visible rows of one chapter as (page index, handle, document offset), plus the header offsets."""
+
+    rows: list[tuple[int, ElementHandle, float]] = field(default_factory=list)
+    y_min: float = -math.inf
+    y_max: float = math.inf
+    rebuilt: bool = False
+
+
+class RowIndex:
+    """Lesson rows looked up per chapter by document order, with the row list cached in the page.
+
+    Each lookup costs a constant number of round trips and transfers only the chapter's own rows.
+    """
+
+    def __init__(self, page: Page, selectors: Sequence[str]) -> None:
+        self.page = page
+        self.selectors = tuple(selectors)
+        self.selector = ""
+        self.total_rows = 0
+        self.rebuilds = 0
+
+    async def chapter_rows(self, headers: Sequence[ElementHandle], chapter_idx: int) -> ChapterRows:
+        header: Optional[ElementHandle] = headers[chapter_idx]
+        following = headers[chapter_idx + 1] if chapter_idx + 1 < len(headers) else None
+        result = await self.page.evaluate_handle(_CHAPTER_ROWS_SCRIPT, [list(self.selectors), header, following])
+        try:
+            meta = await result.evaluate("(rows) => rows.meta")
+            properties = await result.get_properties()
+        finally:
+            await result.dispose()
+        handles = [properties[str(pos)].as_element() for pos in range(len(meta["indices"]))]
+        self.selector = meta["selector"]
+        self.total_rows = meta["total"]
+        if meta["rebuilt"]:
+            self.rebuilds += 1
+        y_min, y_max = meta["bounds"]
+        return ChapterRows(
+            rows=[
+                (idx, handle, offset)
+                for idx, handle, offset in zip(meta["indices"], handles, meta["offsets"])
+                if handle is not None
+            ],
+            y_min=-math.inf if y_min is None else y_min,
+            y_max=math.inf if y_max is None else y_max,
+            rebuilt=meta["rebuilt"],
+        )
@@ -1,27 +1,105 @@
 from __future__ import annotations
 
+import datetime as _dt
+import hashlib
 import json
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterable, Optional
+from urllib.parse import urlsplit
 
 
 STATE_FILE = Path(__file__).with_name("state.json")
 
 
+def course_id(url: str) -> str:
+    """Course identity shared by the ledger and shortfalls: lowercase host and path, no query or trailing slash."""
+    parts = urlsplit(url.strip())
+    return f"{(parts.hostname or '').casefold()}{parts.path.rstrip('/')}"
+
+
+def lesson_key(course: str, chapter_title: str, lesson_title: str, duration_label: str) -> str:
+    """Stable identity of a lesson within ``course``, independent of its position in the page."""
+    values = (chapter_title, lesson_title, duration_label)
+    parts = [course, *(re.sub(r"\s+", " ", value).strip().casefold() for value in values)]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass(slots=True)
+class LedgerEntry:
+    title: str
+    completed_at: str
+    course: str = ""
+
+    def as_dict(self) -> dict[str, str]:
+        return {"title": self.title, "completed_at": self.completed_at, "course": self.course}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LedgerEntry":
+        return cls(
+            title=str(data.get("title", "")),
+            completed_at=str(data.get("completed_at", "")),
+            course=str(data.get("course", "")),
+        )
+
+
+@dataclass(slots=True)
+class LessonRef:
+    chapter_index: int
+    lesson_index: int
+    title: str = ""
+    key: str = ""
+    course: str = ""
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "chapter_index": self.chapter_index,
+            "lesson_index": self.lesson_index,
+            "title": self.title,
+            "key": self.key,
+            "course": self.course,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LessonRef":
+        return cls(
+            chapter_index=int(data.get("chapter_index", 0)),
+            lesson_index=int(data.get("lesson_index", 0)),
+            title=str(data.get("title", "")),
+            key=str(data.get("key", "")),
+            course=str(data.get("course", "")),
+        )
+
+    def label(self) -> str:
+        return f"C{self.chapter_index + 1}.L{self.lesson_index + 1} '{self.title}'"
+
+
 @dataclass(slots=True)
 class AutomationState:
     chapter_index: int = 0
     lesson_index: int = 0
+    shortfalls: list[LessonRef] = field(default_factory=list)
+    ledger: dict[str, LedgerEntry] = field(default_factory=dict)
 
-    def as_dict(self) -> dict[str, int]:
-        return {"chapter_index": self.chapter_index, "lesson_index": self.lesson_index}
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "chapter_index": self.chapter_index,
+            "lesson_index": self.lesson_index,
+            "shortfalls": [ref.as_dict() for ref in self.shortfalls],
+            "ledger": {key: entry.as_dict() for key, entry in self.ledger.items()},
+        }
 
     @classmethod
-    def from_dict(cls, data: dict[str, int]) -> "AutomationState":
+    def from_dict(cls, data: dict[str, Any]) -> "AutomationState":
         return cls(
             chapter_index=int(data.get("chapter_index", 0)),
             lesson_index=int(data.get("lesson_index", 0)),
+            # Shortfalls saved before they were scoped to a course cannot be attributed and are dropped.
+            shortfalls=[
+                ref for ref in (LessonRef.from_dict(item) for item in data.get("shortfalls", [])) if ref.course
+            ],
+            ledger={str(key): LedgerEntry.from_dict(item) for key, item in data.get("ledger", {}).items()},
         )
 
 
@@ -43,6 +121,41 @@ class StateManager:
         self._state.lesson_index = lesson_index
         self._save()
 
+    def is_completed(self, key: str) -> bool:
+        return key in self._state.ledger
+
+    def completed_count(self, course: str) -> int:
+        return sum(1 for entry in self._state.ledger.values() if entry.course == course)
+
+    def mark_completed(self, course: str, lessons: Iterable[tuple[str, str]]) -> None:
+        """Record ``(key, title)`` pairs of ``course`` as completed now; saves once for the whole batch."""
+        stamp = _dt.datetime.now().isoformat(timespec="seconds")
+        added = False
+        for key, title in lessons:
+            if key and key not in self._state.ledger:
+                self._state.ledger[key] = LedgerEntry(title, stamp, course)
+                added = True
+        if added:
+            self._save()
+
+    def pending_shortfalls(self, course: Optional[str] = None) -> list[LessonRef]:
+        """Shortfalls of ``course`` (all courses if None) not completed since, matched by ``lesson_key``."""
+        return [
+            ref
+            for ref in self._state.shortfalls
+            if (course is None or ref.course == course) and not (ref.key and ref.key in self._state.ledger)
+        ]
+
+    def set_shortfalls(self, course: str, chapter_index: int, refs: list[LessonRef]) -> None:
+        """Replace the lessons of ``chapter_index`` in ``course`` still short of 100% after its latest scan."""
+        kept = [
+            ref for ref in self._state.shortfalls if ref.course != course or ref.chapter_index != chapter_index
+        ]
+        if len(kept) == len(self._state.shortfalls) and not refs:
+            return
+        self._state.shortfalls = kept + refs
+        self._save()
+
     def _save(self) -> None:
         try:
             self._path.write_text(json.dumps(self._state.as_dict(), indent=2), encoding="utf-8")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(slots=True)
+class RunControl:
+    """Pause/skip requests set from outside the runner (stop goes through ``stop_event``)."""
+
+    paused: bool = False
+    skip_requested: bool = False
+
+    def consume_skip(self) -> bool:
+        requested = self.skip_requested
+        self.skip_requested = False
+        return requested
+
+
+@dataclass(slots=True)
+class RunStatus:
+    """Live progress of a run; plain attribute writes so updating it costs nothing on the event loop."""
+
+    phase: str = "idle"
+    url: str = ""
+    chapter_index: int = -1
+    chapter_title: str = ""
+    chapter_count: int = 0
+    lesson_index: int = -1
+    lesson_title: str = ""
+    wait_total: float = 0.0
+    waited: float = 0.0
+    queued_wait: float = 0.0
+    started_at: float = field(default_factory=time.time)
+    phase_started_at: float = field(default_factory=time.perf_counter)
+    phase_seconds: dict[str, float] = field(default_factory=dict)
+    phase_counts: dict[str, int] = field(default_factory=dict)
+
+    def enter_phase(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phase_seconds[self.phase] = self.phase_seconds.get(self.phase, 0.0) + now - self.phase_started_at
+        self.phase_counts[phase] = self.phase_counts.get(phase, 0) + 1
+        self.phase = phase
+        self.phase_started_at = now
+
+    def remaining_wait(self) -> float:
+        return max(self.wait_total - self.waited, 0.0)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phase": self.phase,
+            "url": self.url,
+            "chapter": self.chapter_index + 1,
+            "chapter_title": self.chapter_title,
+            "chapter_count": self.chapter_count,
+            "lesson": self.lesson_index + 1,
+            "lesson_title": self.lesson_title,
+            "remaining_wait": round(self.remaining_wait(), 1),
+            "eta_chapter": round(self.remaining_wait() + self.queued_wait, 1),
+            "uptime": round(time.time() - self.started_at, 1),
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        seconds = dict(self.phase_seconds)
+        seconds[self.phase] = seconds.get(self.phase, 0.0) + time.perf_counter() - self.phase_started_at
+        return {
+            "phase_seconds": {name: round(value, 3) for name, value in seconds.items()},
+            "phase_counts": dict(self.phase_counts),
+        }
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Mapping, Optional
+
+
+TIMING_FILE = Path(__file__).with_name("timing.json")
+MAX_SAMPLES = 200
+MIN_SAMPLES = 5
+
+NAVIGATION = "navigation"
+CLICK = "click"
+RENDER_SETTLE = "render_settle"
+COMPLETION_LAG = "completion_lag"
+SHORT_COMPLETION = "short_completion"
+
+
+@dataclass(slots=True)
+class TimingProfile:
+    """Waits and timeouts (seconds) used by the runner for a single host."""
+
+    base_wait: float = 20.0
+    completion_margin: float = 0.0
+    default_timeout: float = 45.0
+    click_timeout: float = 5.0
+    overlay_timeout: float = 5.0
+    backoff_step: float = 0.8
+    render_settle: float = 5.5
+    rescan_delay: float = 1.5
+    expand_delay: float = 0.1
+    completion_poll: float = 5.0
+
+    def as_log_summary(self) -> str:
+        return "\n".join(f"{name}={value:.2f} s" for name, value in asdict(self).items())
+
+
+# Derived values never go below these, whatever the telemetry says.
+SAFETY_FLOOR = TimingProfile(
+    base_wait=10.0,
+    completion_margin=0.0,
+    default_timeout=15.0,
+    click_timeout=2.0,
+    overlay_timeout=2.0,
+    backoff_step=0.2,
+    render_settle=1.0,
+    rescan_delay=0.5,
+    expand_delay=0.05,
+    completion_poll=1.0,
+)
+
+TIMING_FIELDS = frozenset(f.name for f in fields(TimingProfile))
+
+
+def validate_overrides(overrides: Mapping[str, float]) -> None:
+    for name, value in overrides.items():
+        if name not in TIMING_FIELDS:
+            raise ValueError(f"Parametro di timing sconosciuto: {name}")
+        if math.isnan(value):
+            raise ValueError(f"Il parametro di timing {name} non è un numero")
+        if math.isinf(value):
+            raise ValueError(f"Il parametro di timing {name} deve essere finito")
+        if value < 0:
+            raise ValueError(f"Il parametro di timing {name} non può essere negativo")
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class TimingStore:
+    """Per-host latency samples persisted between runs, used to derive a TimingProfile."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path or TIMING_FILE
+        self._samples = self._load()
+
+    def record(self, host: str, metric: str, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        samples = self._samples.setdefault(host, {}).setdefault(metric, [])
+        samples.append(round(value, 3))
+        del samples[:-MAX_SAMPLES]
+
+    def samples(self, host: str, metric: str) -> list[float]:
+        return list(self._samples.get(host, {}).get(metric, []))
+
+    def profile_for(
+        self,
+        host: str,
+        overrides: Optional[Mapping[str, float]] = None,
+        adaptive: bool = True,
+    ) -> TimingProfile:
+        profile = self._derive(host) if adaptive else TimingProfile()
+        if overrides:
+            # Overrides are floored too: a zero timeout means "no timeout" to Playwright.
+            profile = replace(profile, **_floored(overrides))
+        return profile
+
+    def _derive(self, host: str) -> TimingProfile:
+        default = TimingProfile()
+        derived: dict[str, float] = {}
+
+        def estimate(metric: str, q: float, factor: float = 1.0) -> Optional[float]:
+            values = self.samples(host, metric)
+            if len(values) < MIN_SAMPLES:
+                return None
+            return percentile(values, q) * factor
+
+        navigation = estimate(NAVIGATION, 99, 3.0)
+        if navigation is not None:
+            derived["default_timeout"] = navigation
+        click = estimate(CLICK, 99, 3.0)
+        if click is not None:
+            derived["click_timeout"] = click
+            derived["overlay_timeout"] = click
+        render = estimate(RENDER_SETTLE, 95, 1.5)
+        if render is not None:
+            derived["render_settle"] = render
+        short_completion = estimate(SHORT_COMPLETION, 95)
+        if short_completion is not None:
+            derived["base_wait"] = short_completion
+        lag = estimate(COMPLETION_LAG, 95)
+        if lag is not None:
+            derived["completion_margin"] = lag
+
+        return replace(default, **_floored(derived))
+
+    def save(self) -> None:
+        try:
+            self._path.write_text(json.dumps(self._samples, indent=2), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _load(self) -> dict[str, dict[str, list[float]]]:
+        if not self._path.exists():
+            return {}
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        samples: dict[str, dict[str, list[float]]] = {}
+        for host, metrics in data.items():
+            if not isinstance(metrics, dict):
+                continue
+            for metric, values in metrics.items():
+                if not isinstance(values, list):
+                    continue
+                kept = [float(v) for v in values if isinstance(v, (int, float)) and math.isfinite(v)]
+                if kept:
+                    samples.setdefault(str(host), {})[str(metric)] = kept[-MAX_SAMPLES:]
+        return samples
+
+
+def _floored(values: Mapping[str, float]) -> dict[str, float]:
+    return {name: max(value, getattr(SAFETY_FLOOR, name)) for name, value in values.items()}
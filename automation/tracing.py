@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime as _dt
+import re
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterator, Optional
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from .logger import Logger
+
+
+TRACE_DIR = Path(__file__).with_name("traces")
+CHUNK_SECONDS = 60.0
+MAX_ROTATION_FAILURES = 3
+
+
+class RollingTracer:
+    """Playwright tracing in short rotating chunks; only the last ``window_minutes`` are kept on disk.
+
+    The buffer is copied to a ``failure-*`` folder by :meth:`persist` and discarded otherwise.
+    """
+
+    def __init__(
+        self,
+        context: BrowserContext,
+        logger: Logger,
+        directory: Optional[Path] = None,
+        window_minutes: float = 5.0,
+        chunk_seconds: float = CHUNK_SECONDS,
+    ) -> None:
+        self.context = context
+        self.logger = logger
+        self.directory = directory or TRACE_DIR
+        self.buffer_dir = self.directory / "buffer"
+        self.window_seconds = window_minutes * 60
+        self.chunk_seconds = min(chunk_seconds, self.window_seconds)
+        # (monotonic time, files) of closed chunks and snapshots, pruned by age against the window.
+        self._chunks: deque[tuple[float, tuple[Path, ...]]] = deque()
+        self._snapshots: deque[tuple[float, tuple[Path, ...]]] = deque()
+        self._counter = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._started_at = 0.0
+        self._chunk_open = False
+        self._tracing = False
+        self.overhead_seconds = 0.0
+        self.bytes_written = 0
+
+    async def start(self) -> None:
+        shutil.rmtree(self.buffer_dir, ignore_errors=True)
+        self.buffer_dir.mkdir(parents=True, exist_ok=True)
+        self._started_at = time.perf_counter()
+        with self._measure():
+            await self.context.tracing.start(screenshots=True, snapshots=True)
+            self._tracing = True
+            await self.context.tracing.start_chunk()
+            self._chunk_open = True
+        self._task = asyncio.create_task(self._rotate_loop())
+        self.logger.log(
+            f"Tracing a buffer circolare: ultimi {self.window_seconds / 60:g} min in chunk da "
+            f"{self.chunk_seconds:.0f}s in {self.buffer_dir}"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        async with self._lock:
+            await self._stop_tracing()
+        shutil.rmtree(self.buffer_dir, ignore_errors=True)
+
+    async def snapshot(self, page: Page, label: str) -> None:
+        """Screenshot and DOM snapshot of ``page``, rotated like the trace chunks."""
+        async with self._lock:
+            with self._measure():
+                self._counter += 1
+                stem = self.buffer_dir / f"{self._counter:05d}-{_slug(label)}"
+                files: list[Path] = []
+                with contextlib.suppress(Error):
+                    await page.screenshot(path=str(stem.with_suffix(".png")), full_page=True)
+                    files.append(stem.with_suffix(".png"))
+                with contextlib.suppress(Error):
+                    html = stem.with_suffix(".html")
+                    html.write_text(await page.content(), encoding="utf-8")
+                    files.append(html)
+                self._track(self._snapshots, *files)
+
+    async def persist(self, reason: str) -> Optional[Path]:
+        """Flush the current chunk and copy the whole buffer to a failure folder."""
+        async with self._lock:
+            with self._measure():
+                if self._tracing:
+                    with contextlib.suppress(Error):
+                        await self._flush_chunk()
+                self._prune()
+                stamp = _dt.datetime.now().strftime("%Y%m%dT%H%M%S")
+                target = self.directory / f"failure-{stamp}-{_slug(reason)}"
+                try:
+                    shutil.copytree(self.buffer_dir, target)
+                except OSError as exc:
+                    self.logger.log(f"Impossibile salvare il buffer di tracing: {exc}")
+                    return None
+        self.logger.log(f"Buffer di tracing salvato ({reason}): {target}")
+        return target
+
+    def as_log_summary(self) -> str:
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        share = self.overhead_seconds / elapsed * 100 if elapsed else 0.0
+        return (
+            f"Overhead tracing (solo rotazione e snapshot, esclusa la cattura interna di Playwright): "
+            f"{self.overhead_seconds:.2f}s su {elapsed:.0f}s ({share:.2f}%), "
+            f"{self.bytes_written / 1_048_576:.1f} MB scritti"
+        )
+
+    async def _rotate_loop(self) -> None:
+        failures = 0
+        while True:
+            await asyncio.sleep(self.chunk_seconds)
+            async with self._lock:
+                with self._measure():
+                    try:
+                        await self._flush_chunk()
+                    except Error as exc:
+                        failures += 1
+                        self.logger.log(f"Rotazione tracing fallita ({failures}/{MAX_ROTATION_FAILURES}): {exc}")
+                        if failures < MAX_ROTATION_FAILURES:
+                            continue
+                        # An unrotated chunk would grow for the rest of the session: stop recording instead.
+                        await self._stop_tracing()
+                        self.logger.log("Tracing disattivato: rotazione non riuscita")
+                        return
+                    failures = 0
+
+    async def _flush_chunk(self) -> None:
+        """Close the current chunk (if one is open) into the buffer and open the next one."""
+        if self._chunk_open:
+            self._counter += 1
+            path = self.buffer_dir / f"{self._counter:05d}-trace.zip"
+            await self.context.tracing.stop_chunk(path=str(path))
+            self._chunk_open = False
+            self._track(self._chunks, path)
+        await self.context.tracing.start_chunk()
+        self._chunk_open = True
+
+    async def _stop_tracing(self) -> None:
+        if self._chunk_open:
+            with contextlib.suppress(Error):
+                await self.context.tracing.stop_chunk()
+            self._chunk_open = False
+        if self._tracing:
+            with contextlib.suppress(Error):
+                await self.context.tracing.stop()
+            self._tracing = False
+
+    def _track(self, queue: deque[tuple[float, tuple[Path, ...]]], *paths: Path) -> None:
+        queue.append((time.monotonic(), paths))
+        for path in paths:
+            with contextlib.suppress(OSError):
+                self.bytes_written += path.stat().st_size
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop chunks closed and snapshots taken before the window; a chunk closed inside it still holds recent steps."""
+        horizon = time.monotonic() - self.window_seconds
+        for queue in (self._chunks, self._snapshots):
+            while queue and queue[0][0] < horizon:
+                _, paths = queue.popleft()
+                for path in paths:
+                    path.unlink(missing_ok=True)
+
+    @contextlib.contextmanager
+    def _measure(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.overhead_seconds += time.perf_counter() - start
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", value).strip("-")[:40] or "evento"
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .state import LessonRef
+
+
+@dataclass(slots=True)
+class VerificationSummary:
+    """Outcome of the post-chapter completion checks for a whole run."""
+
+    verified: list[LessonRef] = field(default_factory=list)
+    replayed: list[LessonRef] = field(default_factory=list)
+    failed: list[LessonRef] = field(default_factory=list)
+
+    def as_log_summary(self) -> str:
+        lines = [
+            f"Verificate al primo controllo: {len(self.verified)}",
+            f"Recuperate con replay: {len(self.replayed)}",
+            f"Ancora incomplete: {len(self.failed)}",
+        ]
+        lines += [f"  replay OK: {ref.label()}" for ref in self.replayed]
+        lines += [f"  incompleta: {ref.label()}" for ref in self.failed]
+        return "\n".join(lines)